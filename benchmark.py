@@ -11,12 +11,6 @@ import sys
 import time
 import typing as t
 
-import mss  # type: ignore  # not listed in requirements, install manually
-import PIL.Image
-import PIL.ImageGrab
-import pyautogui
-
-
 Arg = t.Union[str, int]  # TypeAlias
 log = logging.getLogger(os.path.basename(os.path.splitext(__file__)[0]))
 
@@ -42,11 +36,19 @@ def fps_limit(fps: int = 60) -> None:
 
 
 def get_pixel(x: int = 0, y: int = 0) -> None:
+    import PIL.ImageGrab
+
     rgb = PIL.ImageGrab.grab(xdisplay="").getpixel((x, y))
     print(rgb)
 
 
 def bench_ss() -> None:
+    # Imported here to keep startup fast for other functions
+    import mss  # type: ignore  # not listed in requirements, install manually
+    import PIL.Image
+    import PIL.ImageGrab
+    import pyautogui
+
     def ss_mss() -> PIL.Image.Image:
         sct = mss.mss()
         ss = sct.grab(sct.monitors[1])
@@ -93,11 +95,7 @@ def main() -> None:
         sys.argv.remove("-v")
     logging.basicConfig(level=loglevel, format="%(levelname)-5.5s: %(message)s")
 
-    funcs = tuple(
-        k
-        for k, v in globals().items()
-        if callable(v) and k not in ("main", "benchmark", "Arg")
-    )
+    funcs = tuple(FUNCTIONS)
     if len(sys.argv) < 2:
         print(
             "Usage: {} FUNCTION [ARGS...]\nAvailable functions:\n\t{}".format(
@@ -119,11 +117,18 @@ def main() -> None:
 
     args: t.List[Arg] = [try_int(_) for _ in sys.argv[2:]]
 
-    res = globals()[func](*args)
+    res = FUNCTIONS[func](*args)
     if res is not None:
         print(repr(res))
 
 
+FUNCTIONS: t.Dict[str, t.Callable[..., t.Any]] = {
+    "fps_limit": fps_limit,
+    "get_pixel": get_pixel,
+    "bench_ss": bench_ss,
+}
+
+
 if __name__ == "__main__":
     try:
         main()
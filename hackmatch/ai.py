@@ -8,16 +8,16 @@ Game solver
 Solving algorithm taken from Justin Frank
 https://github.com/laelath/hack-match-bot
 """
-# TODO: Optimizations:
-# - Board._column_heights cache, cloned, updated on Board.move() only when SWAP, GRAB
-# - Board._score cache, cloned, reset on Board.move() only when SWAP, GRAB
-# - multiprocessing.Pool() or concurrent.futures.ProcessPoolExecutor() in solve()
-#   4 workers to parallelize only the Move loop, returning board/None and best/None
-#   so the main process adds to queue and update boards list and best.
-
-import collections
+
+import concurrent.futures
 import enum
+import heapq
 import logging
+import multiprocessing
+import multiprocessing.synchronize
+import os
+import random
+import signal
 import typing as t
 
 from . import config as c
@@ -26,10 +26,51 @@ from . import util as u
 # Laelath: MAX_SEARCH_TIME = 110ms
 MAX_SOLVE_TIME = 850  # ~50 frames @ 60 FPS
 
+# Score penalty per move when prioritizing boards in solve(), favoring shorter solutions
+MOVE_COST = 1
+
+# Worker processes for solve_parallel(), one per root move. 0 to solve in a single process,
+# as process overhead outweighs the gain without spare CPU cores. Unused with Numba
+SOLVE_WORKERS = min(os.cpu_count() or 1, 4) if (os.cpu_count() or 1) > 1 else 0
+
+# Expansions between checks of the solve_parallel() stop event, as each check takes a lock
+STOP_CHECK = 64
+
 Coord: u.TypeAlias = t.Tuple[int, int]
-Grid: u.TypeAlias = t.Dict[Coord, "Block"]
+Grid: u.TypeAlias = bytearray  # One Block ID per cell, indexed as row * BOARD_COLS + col
+StopEvent: u.TypeAlias = multiprocessing.synchronize.Event
+
+# Board.grid indexes, and their coordinates and adjacent cells, pre-computed at import time
+GRID_INDEXES: t.Tuple[int, ...] = tuple(range(c.BOARD_COLS * c.BOARD_ROWS))
+COORDS: t.Tuple[Coord, ...] = tuple(
+    (i % c.BOARD_COLS, i // c.BOARD_COLS) for i in GRID_INDEXES
+)
+ADJACENTS: t.Tuple[t.Tuple[int, ...], ...] = tuple(
+    tuple(
+        i + offset
+        for offset, valid in (
+            (1, col < c.BOARD_COLS - 1),
+            (-1, col > 0),
+            (c.BOARD_COLS, row < c.BOARD_ROWS - 1),
+            (-c.BOARD_COLS, row > 0),
+        )
+        if valid
+    )
+    for i, (col, row) in enumerate(COORDS)
+)
+ADJACENT_COORDS: t.Tuple[t.Tuple[Coord, ...], ...] = tuple(
+    tuple(COORDS[adjacent] for adjacent in adjacents) for adjacents in ADJACENTS
+)
+# Adjacent cells already visited when scanning the grid in order, i.e. left and top
+PRECEDING_ADJACENTS: t.Tuple[t.Tuple[int, ...], ...] = tuple(
+    tuple(adjacent for adjacent in adjacents if adjacent < i)
+    for i, adjacents in enumerate(ADJACENTS)
+)
 
 solve_speed: t.List[float] = []
+_executor: t.Optional[concurrent.futures.ProcessPoolExecutor] = None
+_stop: t.Optional["StopEvent"] = None  # Shared by solve_parallel() and its workers
+_pending: t.List["concurrent.futures.Future[t.Any]"] = []  # Workers not yet stopped
 
 log = logging.getLogger(__name__)
 
@@ -38,29 +79,58 @@ class InvalidCoordError(u.HMError, ValueError):
     """The specified row or column for a block in the board is invalid"""
 
 
-class Block(str, enum.Enum):
-    # str base so EMPTY can be Falsy, values are otherwise irrelevant
-    # So chosen as their str representation for convenience
-    EMPTY = ""
-    YELLOW = "y"
-    GREEN = "g"
-    RED = "r"
-    PINK = "p"
-    BLUE = "b"
-    Y_BOMB = "Y"
-    G_BOMB = "G"
-    R_BOMB = "R"
-    P_BOMB = "P"
-    B_BOMB = "B"
+class Block(enum.IntEnum):
+    """Block IDs, as stored in Board.grid. EMPTY is 0, so it is Falsy"""
+
+    # fmt: off
+    EMPTY  = 0
+    YELLOW = 1
+    GREEN  = 2
+    RED    = 3
+    PINK   = 4
+    BLUE   = 5
+    Y_BOMB = 6
+    G_BOMB = 7
+    R_BOMB = 8
+    P_BOMB = 9
+    B_BOMB = 10
+    # fmt: on
 
     def __str__(self) -> str:
-        return self.value if self else "."
+        return BLOCK_CHARS[self]
 
     def __repr__(self) -> str:
         return f"<{self.__class__.__name__}.{self.name}>"
 
+    @classmethod
+    def from_char(cls, char: str) -> "Block":
+        return cls(BLOCK_CHARS.index(char))
+
     def match_size(self) -> int:
-        return 2 if self.name[-5:] == "_BOMB" else 4
+        return BLOCK_MATCH_SIZE[self]
+
+
+# Plain int Block IDs, used in the solver hot paths instead of Block enum members
+# fmt: off
+(
+    EMPTY, YELLOW, GREEN, RED, PINK, BLUE, Y_BOMB, G_BOMB, R_BOMB, P_BOMB, B_BOMB,
+) = range(len(Block))
+BLOCK_CHARS = ".ygrpbYGRPB"  # Indexed by Block ID
+BLOCK_MATCH_SIZE = bytes((0, 4, 4, 4, 4, 4, 2, 2, 2, 2, 2))  # Indexed by Block ID
+# fmt: on
+
+# Table for bytes.translate(), from Block IDs to their chars
+BLOCK_TRANSLATE = bytes.maketrans(bytes(range(len(BLOCK_CHARS))), BLOCK_CHARS.encode())
+
+# Zobrist hashing random keys: for each grid index and Block ID, phage column, held block.
+# EMPTY keys are 0, so an empty grid hashes to 0. Fixed seed for reproducible solving.
+_random = random.Random(0)
+ZOBRIST_GRID: t.Tuple[t.Tuple[int, ...], ...] = tuple(
+    (0, *(_random.getrandbits(64) for _ in BLOCK_CHARS[1:])) for _ in COORDS
+)
+ZOBRIST_PHAGE: t.Tuple[int, ...] = tuple(_random.getrandbits(64) for _ in range(c.BOARD_COLS))
+ZOBRIST_HELD: t.Tuple[int, ...] = (0, *(_random.getrandbits(64) for _ in BLOCK_CHARS[1:]))
+del _random
 
 
 class Move(enum.Enum):
@@ -84,11 +154,38 @@ class Move(enum.Enum):
         return self.name
 
 
+# Move codes, used by the solver instead of the Move enum. Indexes of MOVES
+LEFT, RIGHT, GRAB, SWAP = range(4)
+MOVES: t.Tuple[Move, ...] = (Move.LEFT, Move.RIGHT, Move.GRAB, Move.SWAP)
+NO_MOVE = len(MOVES)  # Last move code of a board with no moves
+
+# Moves worth trying after each move code, skipping the one that would undo it:
+# LEFT/RIGHT undo each other, a second GRAB throws the block back, a second SWAP
+# swaps it back. Indexed by last move code, including NO_MOVE
+# fmt: off
+NEXT_MOVES: t.Tuple[t.Tuple[int, ...], ...] = (
+    (LEFT,        GRAB, SWAP),  # LEFT
+    (      RIGHT, GRAB, SWAP),  # RIGHT
+    (LEFT, RIGHT,       SWAP),  # GRAB
+    (LEFT, RIGHT, GRAB      ),  # SWAP
+    (LEFT, RIGHT, GRAB, SWAP),  # NO_MOVE
+)
+# fmt: on
+
+
 class Group(t.NamedTuple):
-    block: Block
+    block: int
     coords: t.List[Coord]
 
 
+class MovesNode(t.NamedTuple):
+    """Moves as a linked list, so boards share their parent's moves"""
+
+    move: int  # Move code
+    parent: t.Optional["MovesNode"]
+    length: int  # Length of the list up to this node
+
+
 class Candidate(t.NamedTuple):
     board: "Board"
     score: float = 0
@@ -96,33 +193,70 @@ class Candidate(t.NamedTuple):
 
 
 class Board:
+    __slots__ = (
+        "grid",
+        "phage_col",
+        "held_block",
+        "_moves",
+        "_groups",
+        "_heights",
+        "_imbalance",
+        "_score",
+        "_zobrist",
+        "_shared",
+    )
+
     def __init__(
         self,
         grid: t.Optional[Grid] = None,
         phage_col: t.Optional[int] = None,
-        held_block: Block = Block.EMPTY,
-        moves: t.Optional[t.List[Move]] = None,
+        held_block: int = EMPTY,
+        moves: t.Optional[MovesNode] = None,
         _groups: t.Optional[t.List[Group]] = None,
     ):
-        self.grid: Grid = {} if grid is None else grid
+        self.grid: Grid = bytearray(c.BOARD_COLS * c.BOARD_ROWS) if grid is None else grid
         self.phage_col: int = c.BOARD_COLS // 2 if phage_col is None else phage_col
-        self.held_block: Block = held_block
-        self._moves: t.List[Move] = [] if moves is None else moves
+        self.held_block: int = held_block
+        self._moves: t.Optional[MovesNode] = moves
+        # Caches, shared with clones, so move() resets or replaces them, never in-place
         self._groups: t.List[Group] = [] if _groups is None else _groups
-        # self._score: int = 0
+        self._heights: t.Optional[t.List[int]] = None
+        self._imbalance: t.Optional[float] = None
+        self._score: t.Optional[float] = None
+        # Grid Zobrist hash, updated by set_block()
+        self._zobrist: int = 0
+        for i, block in enumerate(self.grid):
+            self._zobrist ^= ZOBRIST_GRID[i][block]
+        # If grid is shared with clones, so set_block() copies it before changing it.
+        # Change grid only via set_block()
+        self._shared: bool = False
 
     @property
-    def id(self) -> object:
-        """Identity when solving the board, ignores moves list"""
-        return (
-            frozenset((coord, block) for (coord, block) in self.grid.items() if block),
-            self.phage_col,
-            self.held_block,
-        )
+    def key(self) -> int:
+        """Zobrist hash of grid, phage column and held block, ignoring moves list
+
+        Used to identify boards when solving.
+        """
+        return self._zobrist ^ ZOBRIST_PHAGE[self.phage_col] ^ ZOBRIST_HELD[self.held_block]
 
     @property
     def moves(self) -> t.List[Move]:
-        return self._moves
+        moves: t.List[Move] = []
+        node = self._moves
+        while node is not None:
+            moves.append(MOVES[node.move])
+            node = node.parent
+        moves.reverse()
+        return moves
+
+    @property
+    def moves_count(self) -> int:
+        return 0 if self._moves is None else self._moves.length
+
+    @property
+    def last_move(self) -> int:
+        """Last move code, NO_MOVE if there are no moves"""
+        return NO_MOVE if self._moves is None else self._moves.move
 
     @property
     def is_title(self) -> bool:
@@ -143,11 +277,8 @@ class Board:
         for row, line in enumerate(lines[:-1]):
             assert not line or len(line) == c.BOARD_COLS
             for col, char in enumerate(line):
-                self.set_block(col, row, Block.EMPTY if char == empty else Block(char))
-        # Fill remaining lines with Block.EMPTY
-        for row in range(row + 1, c.BOARD_ROWS):
-            for col in range(c.BOARD_COLS):
-                self.set_block(col, row, Block.EMPTY)
+                self.set_block(col, row, EMPTY if char == empty else Block.from_char(char))
+        # Remaining lines are already EMPTY
         # Parse ground line for phage column and held item
         line = lines[-1]
         assert len(line) <= c.BOARD_COLS
@@ -155,77 +286,109 @@ class Board:
             if char == ground:
                 continue
             if char != phage:
-                self.held_block = Block(char)
+                self.held_block = Block.from_char(char)
             self.phage_col = col
             break
         return self
 
-    def get_block(self, col: int, row: int) -> Block:
-        return self.grid.get((col, row), Block.EMPTY)
+    def get_block(self, col: int, row: int) -> int:
+        return self.grid[row * c.BOARD_COLS + col]
 
-    def set_block(self, col: int, row: int, block: Block) -> None:
+    def set_block(self, col: int, row: int, block: int) -> None:
         if not (0 <= col < c.BOARD_COLS and 0 <= row < c.BOARD_ROWS):
             raise InvalidCoordError("Invalid board coordinates: %s", (col, row))
-        # For correctness this should also reset _groups cache.
+        # For correctness this should also reset caches.
         # Ignoring for performance as this is only called when parsing from image
-        # (when cache is not used) and from move(), which performs the reset itself.
-        self.grid[col, row] = block
+        # (when cache is not used). move() uses _set_block() and resets it itself.
+        self._set_block(row * c.BOARD_COLS + col, block)
+
+    def _set_block(self, i: int, block: int) -> None:
+        """Set block by grid index, without coordinates validation"""
+        if self._shared:
+            self.grid = bytearray(self.grid)
+            self._shared = False
+        zobrist = ZOBRIST_GRID[i]
+        self._zobrist ^= zobrist[self.grid[i]] ^ zobrist[block]
+        self.grid[i] = block
 
     def clone(self) -> "Board":
-        return self.__class__(
-            self.grid.copy(),
-            self.phage_col,
-            self.held_block,
-            self.moves.copy(),
-            self._groups.copy(),
-        )
-
-    def lowest_block(self, col: int, up_to: int = 0) -> t.Tuple[int, Block]:
-        for row in range(c.BOARD_ROWS - 1, up_to - 1, -1):
-            block = self.get_block(col, row)
-            if block:
-                return row, block
-        else:
-            return -1, Block.EMPTY
-
-    def move(self, move: Move) -> None:
-        self._moves.append(move)
-        col = self.phage_col
-        if move == Move.LEFT:
+        # Bypass __init__(), its defaults and Zobrist hash from scratch
+        board = object.__new__(self.__class__)
+        # Copy-on-write grid, as LEFT and RIGHT moves do not change it
+        board.grid = self.grid
+        board._shared = self._shared = True
+        board.phage_col = self.phage_col
+        board.held_block = self.held_block
+        board._moves = self._moves
+        board._groups = self._groups
+        board._heights = self._heights
+        board._imbalance = self._imbalance
+        board._score = self._score
+        board._zobrist = self._zobrist
+        return board
+
+    def lowest_block(self, col: int, up_to: int = 0) -> t.Tuple[int, int]:
+        grid, cols = self.grid, c.BOARD_COLS
+        # Strip the trailing empty cells of the column slice
+        row = len(grid[col::cols].rstrip(b"\0")) - 1
+        if row < up_to:
+            return -1, EMPTY
+        return row, grid[row * cols + col]
+
+    def move(self, move: int) -> None:
+        """Apply a move, by its move code"""
+        self._moves = MovesNode(move, self._moves, self.moves_count + 1)
+        col, cols = self.phage_col, c.BOARD_COLS
+        if move == LEFT:
             if col > 0:
                 self.phage_col -= 1
-        elif move == Move.RIGHT:
-            if col < c.BOARD_COLS - 1:
+        elif move == RIGHT:
+            if col < cols - 1:
                 self.phage_col += 1
-        elif move == Move.SWAP:
+        elif move == SWAP:
             row, block = self.lowest_block(col, 1)
             if row > 0:
-                self.set_block(col, row, self.get_block(col, row - 1))
-                self.set_block(col, row - 1, block)
-                self._groups = []  # invalidate cache
-        elif move == Move.GRAB:
+                i = row * cols + col
+                self._set_block(i, self.grid[i - cols])
+                self._set_block(i - cols, block)
+                # invalidate cache. Swap does not change heights, and so imbalance
+                self._groups = []
+                self._score = None
+        elif move == GRAB:
             row, block = self.lowest_block(col)
             if self.held_block:
                 # Throw: lowest block must not be at the lowest row
                 if row < c.BOARD_ROWS - 1:
-                    self.set_block(col, row + 1, self.held_block)
-                    self.held_block = Block.EMPTY
-                    self._groups = []  # invalidate cache
+                    self._set_block((row + 1) * cols + col, self.held_block)
+                    self.held_block = EMPTY
+                    self._groups, self._score = [], None
+                    self._update_height(col, +1)
             else:
                 # Grab: There must be a (non-empty) block in the column
                 if block:
-                    self.set_block(col, row, self.held_block)
+                    self._set_block(row * cols + col, EMPTY)
                     self.held_block = block
-                    self._groups = []  # invalidate cache
+                    self._groups, self._score = [], None
+                    self._update_height(col, -1)
+
+    def _update_height(self, col: int, delta: int) -> None:
+        """Update the heights cache, if any, on a copy as it is shared with clones
+
+        Also reset the imbalance cache, which depends on heights.
+        """
+        self._imbalance = None
+        if self._heights is not None:
+            self._heights = self._heights.copy()
+            self._heights[col] += delta
 
     def __eq__(self, other: object) -> bool:
         """Equivalence when parsing blocks from image, ignores phage column and moves"""
         if not isinstance(other, self.__class__):
             return NotImplemented
-        return self.grid == other.grid and self.held_block == self.held_block
+        return self.grid == other.grid and self.held_block == other.held_block
 
     def __hash__(self) -> int:
-        return hash(self.id)
+        return self._zobrist ^ ZOBRIST_HELD[self.held_block]
 
     def __str__(self) -> str:
         return self.serialize(sep="\n")
@@ -234,74 +397,93 @@ class Board:
         self, sep: str = "-", phage: str = "@", empty: str = ".", ground: str = "_"
     ) -> str:
         phage_row = [ground] * c.BOARD_COLS
-        phage_row[self.phage_col] = str(self.held_block) if self.held_block else phage
+        phage_row[self.phage_col] = BLOCK_CHARS[self.held_block] if self.held_block else phage
+        text = self.grid.translate(BLOCK_TRANSLATE).decode()
+        if empty != BLOCK_CHARS[EMPTY]:
+            text = text.replace(BLOCK_CHARS[EMPTY], empty)
         return (
-            sep.join(
-                "".join(str(self.get_block(col, row) or empty) for col in range(c.BOARD_COLS))
-                for row in range(c.BOARD_ROWS)
-            )
+            sep.join(text[i : i + c.BOARD_COLS] for i in range(0, len(text), c.BOARD_COLS))
             + sep
             + "".join(phage_row)
         )
 
     @staticmethod
-    def adjacents(col: int, row: int) -> t.List[Coord]:
-        coords: t.List[Coord] = []
-        for offset in ((1, 0), (-1, 0), (0, 1), (0, -1)):
-            coord = (col + offset[0], row + offset[1])
-            if 0 <= coord[0] < c.BOARD_COLS and 0 <= coord[1] < c.BOARD_ROWS:
-                coords.append(coord)
-        return coords
+    def adjacents(col: int, row: int) -> t.Tuple[Coord, ...]:
+        return ADJACENT_COORDS[row * c.BOARD_COLS + col]
 
     def solve(self, max_solve_time: int = MAX_SOLVE_TIME) -> t.List[Move]:
         return solve(self, max_solve_time)
 
     def heights(self) -> t.List[int]:
-        return list(
-            sum(1 if self.get_block(col, row) else 0 for row in range(c.BOARD_ROWS))
-            for col in range(c.BOARD_COLS)
-        )
+        if self._heights is None:
+            # Column slices and counting empty cells, all done in C
+            grid, cols, rows = self.grid, c.BOARD_COLS, c.BOARD_ROWS
+            self._heights = [rows - grid[col::cols].count(EMPTY) for col in range(cols)]
+        return self._heights
 
     def groups(self) -> t.List[Group]:
         if self._groups:
             return self._groups
 
-        def invite(coord: Coord, group: Group) -> None:
-            block = self.get_block(*coord)
-            if block and coord not in grouped and block == group.block:
-                grouped.add(coord)
-                if not group.coords:
-                    self._groups.append(group)
-                group.coords.append(coord)
-                for adjacent in self.adjacents(*coord):
-                    invite(adjacent, group)
-
-        grouped: t.Set[Coord] = set()
-        for col in range(c.BOARD_COLS):
-            for row in range(c.BOARD_ROWS):
-                invite((col, row), Group(self.get_block(col, row), []))
-        return self._groups
+        # Union-find, with path halving
+        def find(i: int) -> int:
+            while parent[i] != i:
+                parent[i] = i = parent[parent[i]]
+            return i
+
+        grid = self.grid
+        parent = list(GRID_INDEXES)  # Copying is faster than building from range()
+        for i, block in enumerate(grid):
+            if not block:
+                continue
+            # Union with already visited neighbors
+            for adjacent in PRECEDING_ADJACENTS[i]:
+                if grid[adjacent] == block:
+                    root, other = find(i), find(adjacent)
+                    if root != other:
+                        parent[other] = root
+
+        groups: t.List[Group] = []
+        roots: t.Dict[int, Group] = {}
+        for i, block in enumerate(grid):
+            if block:
+                root = find(i)
+                if root not in roots:
+                    roots[root] = Group(block, [])
+                    groups.append(roots[root])
+                roots[root].coords.append(COORDS[i])
+        self._groups = groups
+        return groups
 
     def has_match(self) -> bool:
-        return any(len(group.coords) >= group.block.match_size() for group in self.groups())
+        return any(
+            len(group.coords) >= BLOCK_MATCH_SIZE[group.block] for group in self.groups()
+        )
 
     def score(self) -> float:
         """Sum of squared block group sizes, minus imbalance squared, +1 if holding"""
-        groups = self.groups()
-        return (
-            sum(len(group.coords) ** 2 for group in groups) / (len(groups) if groups else 1)
-            - self.imbalance() ** 2
-            + (1 if self.held_block else 0)
-        )
+        if self._score is None:
+            groups = self.groups()
+            self._score = (
+                sum(len(group.coords) ** 2 for group in groups)
+                / (len(groups) if groups else 1)
+                - self.imbalance() ** 2
+                + (1 if self.held_block else 0)
+            )
+        return self._score
 
     def imbalance(self) -> float:
         """Sum of squared differences from each column height to the mean height"""
-        heights = self.heights()
-        mean = sum(heights) / len(heights)
-        return sum((height - mean) ** 2 for height in heights)  # + max(heights)
+        if self._imbalance is None:
+            # Same as sum((height - mean) ** 2), with integer sums and a single division
+            heights = self.heights()
+            total = sum(heights)
+            squares = sum(height * height for height in heights)
+            self._imbalance = squares - total * total / len(heights)  # + max(heights)
+        return self._imbalance
 
     def debug(self, caption: str = "Board", show_self: bool = True) -> None:
-        if not log.level <= logging.DEBUG:
+        if not log.isEnabledFor(logging.DEBUG):
             return
         if show_self:
             log.debug("%s:\n%s", caption, self)
@@ -315,27 +497,13 @@ class Board:
 
 def solve(board: Board, max_solve_time: int = MAX_SOLVE_TIME) -> t.List[Move]:
     board.debug(show_self=False)
-    boards: t.Set[Board] = {board}
-    best = Candidate(board=board, score=board.score(), has_match=board.has_match())
-    queue: t.Deque[Board] = collections.deque([board])  # First in, first out
     timer = u.Timer(max_solve_time / 1000) if max_solve_time > 0 else u.Clock()
-    steps = 0
-    while queue and not timer.expired and not best.has_match:
-        parent = queue.popleft()
-        length = len(parent.moves)
-        if steps < length + 1:
-            steps = length + 1
-        # Get a new board for each possible movement
-        for move in (Move.LEFT, Move.RIGHT, Move.GRAB, Move.SWAP):
-            board, best = solve_move(parent, move, boards, best)
-            if board is not parent:
-                boards.add(board)
-                queue.append(board)
+    best, count, steps, queued = _solve(board, timer)
     elapsed = timer.elapsed
-    speed = len(boards) / elapsed
+    speed = count / elapsed
     if best.has_match:
         reason = "MATCH FOUND! After"
-    elif queue:
+    elif queued:
         reason = "TIMEOUT after"
         solve_speed.append(speed)
     else:
@@ -344,24 +512,178 @@ def solve(board: Board, max_solve_time: int = MAX_SOLVE_TIME) -> t.List[Move]:
         "%s %.0fms, %s boards (%.0f boards/s), %s moves deep",
         reason,
         elapsed * 1000,
-        len(boards),
+        count,
         speed,
         steps,
     )
     best.board.debug("New board")
     # Move to the middle column to help next solve() to see more boards
     center = best.board.phage_col - (c.BOARD_COLS // 2)
+    moves = best.board.moves
     if center:
-        best.board.moves.extend(abs(center) * ([Move.LEFT] if center > 0 else [Move.RIGHT]))
-    return best.board.moves
+        moves.extend(abs(center) * ([Move.LEFT] if center > 0 else [Move.RIGHT]))
+    return moves
+
+
+def warmup() -> None:
+    """Prepare the solver before the first solve(), which is otherwise much slower
+
+    Compile the Numba solver, or load it from the on-disk cache, and allocate its
+    buffers. Or start the pool of worker processes, depending on the solver in use.
+    """
+    timer = u.Clock()
+    if u.HAVE_NUMBA:
+        # A board with a match is enough, jit.solve() compiles before checking it
+        _solve(TITLE_BOARDS[0], u.Timer(0.001))
+    elif SOLVE_WORKERS:
+        # One no-op task per worker, so all processes are started
+        executor, _ = _get_executor()
+        concurrent.futures.wait([executor.submit(int) for _ in range(SOLVE_WORKERS)])
+    log.debug("Solver warmup: %.0fms", timer.elapsed * 1000)
+
+
+def _solve(board: Board, timer: u.Timer) -> t.Tuple[Candidate, int, int, bool]:
+    if u.HAVE_NUMBA:
+        from . import jit
+
+        return jit.solve(board, timer)
+    if SOLVE_WORKERS:
+        return solve_parallel(board, timer)
+    return solve_python(board, timer)
+
+
+def solve_python(board: Board, timer: u.Timer) -> t.Tuple[Candidate, int, int, bool]:
+    """Pure-Python solver. Return best candidate, boards count, steps, and queue status
+
+    Best-first search: boards with the highest score minus moves cost are expanded
+    first, ties in FIFO order.
+    """
+    boards: t.Set[int] = {board.key}
+    best = Candidate(board=board, score=board.score(), has_match=board.has_match())
+    # Priority queue of (moves cost - score, insertion order, board)
+    priority = MOVE_COST * board.moves_count - best.score
+    queue: t.List[t.Tuple[float, int, Board]] = [(priority, 0, board)]
+    steps = 0
+    while queue and not timer.expired and not best.has_match:
+        parent = heapq.heappop(queue)[-1]
+        length = parent.moves_count
+        if steps < length + 1:
+            steps = length + 1
+        # Get a new board for each possible movement
+        for move in NEXT_MOVES[parent.last_move]:
+            board, best = solve_move(parent, move, boards, best)
+            if best.has_match:
+                break  # Siblings must not replace the match, same as jit.solve()
+            if board is not parent:
+                priority = MOVE_COST * board.moves_count - board.score()
+                heapq.heappush(queue, (priority, len(boards), board))
+    return best, len(boards), steps, bool(queue)
+
+
+def solve_parallel(board: Board, timer: u.Timer) -> t.Tuple[Candidate, int, int, bool]:
+    """Solve each root move in a separate process. Same return as solve_python()
+
+    Root moves are expanded here, so a match among them is returned right away.
+    Workers stop as soon as any of them finds a match, and the match with fewest
+    moves wins, ties in root move order.
+    """
+    boards: t.Set[int] = {board.key}
+    best = Candidate(board=board, score=board.score(), has_match=board.has_match())
+    if best.has_match:
+        return best, 1, 0, False
+    children: t.List[Board] = []
+    for move in NEXT_MOVES[board.last_move]:
+        child, best = solve_move(board, move, boards, best)
+        if best.has_match:
+            return best, len(boards), board.moves_count + 1, False
+        if child is not board:
+            children.append(child)
+    if not children or timer.expired:
+        return best, len(boards), board.moves_count + 1, bool(children)
+
+    global _pending
+    executor, stop = _get_executor()
+    # Workers left running by a previous timeout were signaled to stop
+    concurrent.futures.wait(_pending)
+    stop.clear()
+    secs = max(timer.remaining, 1e-6) if timer.secs > 0 else 0  # 0: no time limit
+    futures = {
+        executor.submit(_solve_subtree, child, secs): i for i, child in enumerate(children)
+    }
+    count, steps, queued = len(boards), board.moves_count + 1, False
+    match_key = (0, 0)  # Moves count and root move order of best match
+    try:
+        for future in concurrent.futures.as_completed(futures, timeout=secs or None):
+            candidate, subtree_count, subtree_steps, subtree_queued = future.result()
+            count += subtree_count - 1  # Subtree root is already in boards
+            steps = max(steps, subtree_steps)
+            queued = queued or subtree_queued
+            if candidate.has_match:
+                stop.set()
+                key = (candidate.board.moves_count, futures[future])
+                if not best.has_match or key < match_key:
+                    best, match_key = candidate, key
+            elif not best.has_match and candidate.score > best.score:
+                best = candidate
+    except concurrent.futures.TimeoutError:
+        # Do not wait for late workers, keep the best so far
+        stop.set()
+        queued = True
+    _pending = [future for future in futures if not future.done()]
+    return best, count, steps, queued
+
+
+def _get_executor() -> t.Tuple[concurrent.futures.ProcessPoolExecutor, "StopEvent"]:
+    """Persistent pool of solve_parallel() workers, and their shared stop event"""
+    global _executor, _stop
+    if _executor is None or _stop is None:
+        _stop = multiprocessing.Event()
+        _executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=SOLVE_WORKERS,
+            initializer=_init_worker,
+            initargs=(_stop,),
+        )
+    return _executor, _stop
+
+
+def _init_worker(stop: "StopEvent") -> None:
+    global _stop
+    # Workers ignore CTRL+C, let the main process handle it
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    _stop = stop
+
+
+class _StopTimer(u.Timer):
+    """Timer that also expires when solve_parallel() signals a match was found"""
+
+    def __init__(self, secs: float, stop: "StopEvent"):
+        super().__init__(secs)
+        self.stop = stop
+        self.checks = 0
+
+    @property
+    def expired(self) -> bool:
+        self.checks += 1
+        if self.checks % STOP_CHECK == 0 and self.stop.is_set():
+            return True
+        return self.secs > 0 and self.remaining < 0
+
+
+def _solve_subtree(board: Board, secs: float) -> t.Tuple[Candidate, int, int, bool]:
+    # Timer is re-created as perf_counter() is not guaranteed to be system-wide
+    assert _stop is not None
+    return solve_python(board, _StopTimer(secs, _stop))
 
 
 def solve_move(
-    parent: Board, move: Move, boards: t.Set[Board], best: Candidate
+    parent: Board, move: int, boards: t.Set[int], best: Candidate
 ) -> t.Tuple[Board, Candidate]:
     board = parent.clone()
     board.move(move)
-    if board in boards:
+    # Add to boards and check for duplicates with a single hash lookup
+    count = len(boards)
+    boards.add(board.key)
+    if len(boards) == count:
         # Ignore duplicated boards
         return parent, best
     if board.has_match():
@@ -33,6 +33,7 @@ GAME_CONFIG_PATH = ""  # to be determined at run-time by init()
 # Steam
 STEAM_LAUNCH_URI = "steam://rungameid/716490"
 STEAM_USERID_URL = "https://steamcommunity.com/id/{steam_user_name}"
+STEAM_PROFILE_RE = re.compile(r"^\s*g_rgProfileData\s*=\s*(?P<json>.*);\s*$", re.MULTILINE)
 
 # Graphics
 WINDOW_TITLE = "EXAPUNKS"
@@ -73,6 +74,7 @@ args: argparse.Namespace = argparse.Namespace(
     string=None,
     timeout=850,
     watch=False,
+    workers=0,
 )
 
 log = logging.getLogger(__name__)
@@ -104,7 +106,7 @@ def get_steam_user_id(steam_user_name: str) -> int:
     # https://github.com/ValvePython/steam
     # html = requests.get(STEAM_USERID_URL.format(steam_user_name=steam_user_name)).text
     html = steam_user_name
-    data = re.search(r"^\s*g_rgProfileData\s*=\s*(?P<json>.*);\s*$", html, re.MULTILINE)
+    data = STEAM_PROFILE_RE.search(html)
     if not data:
         return 0
     return int(json.loads(data.group("json"))["steamid"])
@@ -27,10 +27,10 @@ def read_settings() -> c.GameSettings:
     c.check_init()
     log.info("Read game settings: %s", c.GAME_CONFIG_PATH)
     with open(c.GAME_CONFIG_PATH) as f:
-        settings = f.readlines()
-    data: c.GameSettings = {
-        k.strip(): v.strip() for k, v in (line.split("=") for line in settings)
-    }
+        # Single pass, skipping lines without "=" and allowing "=" in values
+        data: c.GameSettings = {
+            k.strip(): v.strip() for k, sep, v in (line.partition("=") for line in f) if sep
+        }
     log.debug("Parsed game settings: %s", data)
     return data
 
@@ -38,9 +38,8 @@ def read_settings() -> c.GameSettings:
 def write_settings(settings: c.GameSettings) -> None:
     c.check_init()
     log.info("Write game settings: %s", c.GAME_CONFIG_PATH)
-    text = "\n".join(f"{k} = {v}" for k, v in settings.items())
     with open(c.GAME_CONFIG_PATH, "w") as f:
-        f.write(text + "\n")
+        f.writelines(f"{k} = {v}\n" for k, v in settings.items())
 
 
 def check_settings(
@@ -61,9 +60,12 @@ def check_settings(
 
 def change_settings(settings: t.Optional[c.GameSettings] = None) -> bool:
     data = read_settings() if settings is None else settings
-    original = data.copy()
-    data.update({k: str(v) for k, v in c.GAME_SETTINGS.items()})
-    if data == original:
+    changed = False
+    for k, v in c.GAME_SETTINGS.items():
+        if data.get(k) != str(v):
+            data[k] = str(v)
+            changed = True
+    if not changed:
         return False
     log.debug("Updated game settings: %s", data)
     write_settings(data)
@@ -26,6 +26,9 @@ if u.WINDOWS or sys.platform == "win32":
 else:
     import pyautogui
 
+if u.HAVE_NUMPY:
+    np = u.numpy
+
 log = logging.getLogger(__name__)
 # Silence PIL debug messages when saving PNGs
 logging.getLogger("PIL.PngImagePlugin").setLevel(logging.WARNING)
@@ -37,6 +40,11 @@ Offset: u.TypeAlias = t.Tuple[int, int]  # x, y
 Image: u.TypeAlias = PIL.Image.Image
 Window: u.TypeAlias = pywinctl.Window
 ParamCls: u.TypeAlias = t.Type["Parameters"]
+Palette: u.TypeAlias = t.Tuple["np.ndarray[t.Any, t.Any]", "np.ndarray[t.Any, t.Any]"]
+# Caches for get_palette(), get_board_parameters() and BaseBlock.match()
+_palettes: t.Dict[t.Type["BaseBlock"], Palette] = {}
+_boards: t.Dict[ParamCls, ParamCls] = {}
+_matches: t.Dict[t.Tuple[t.Type["BaseBlock"], int], t.Dict[bytes, t.Any]] = {}
 
 BPP: int = 3  # Bits per pixel in Image data (bit depth)
 MATCH_PIXELS = 8  # Pixels in a row to consider a block match
@@ -62,12 +70,26 @@ class BaseBlock(bytes, enum.Enum):
     # - return item in set(i.value for i in cls) | set (cls)  # caching sets
     @classmethod
     def match(cls: t.Type[_BT], value: bytes, repeat: int = 8) -> _BT:
-        block = next((item for item in cls if repeat * item == value), cls(b""))
-        # Handle "aliases": names with a "X*_NAME*" pattern
-        if block.name[0] == "X":
-            # noinspection PyTypeChecker, buggy PyCharm
-            return cls[block.name.split("_", 1)[-1]]
-        return block
+        key = (cls, repeat)
+        if key not in _matches:
+            _matches[key] = cls._match_table(repeat)
+        table = _matches[key]
+        # Misses, such as non-uniform runs, map to EMPTY: b"" in table, as repeat * b""
+        return t.cast(_BT, table.get(value, table[b""]))
+
+    @classmethod
+    def _match_table(cls: t.Type[_BT], repeat: int) -> t.Dict[bytes, _BT]:
+        """Map of repeated values to their blocks, for match()"""
+        table: t.Dict[bytes, _BT] = {}
+        for item in cls:
+            block = item
+            # Handle "aliases": names with a "X*_NAME*" pattern
+            if block.name[0] == "X":
+                # noinspection PyTypeChecker, buggy PyCharm
+                block = cls[block.name.split("_", 1)[-1]]
+            # First item wins, if values are repeated
+            table.setdefault(repeat * item.value, block)
+        return table
 
     def to_ai(self) -> ai.Block:
         return ai.Block[self.name]
@@ -90,6 +112,8 @@ class Parameters:
     WIDTH: int = 0  # Board width, BLOCK_SIZE[0] * BOARD_COLS
     MATCH_X_OFFSET: int = 0  # Offset from block left using BLOCK_SIZE and MATCH_PIXELS
     BLOCKS_Y_RANGE: t.Tuple[int, int, int] = (0, 0, 0)  # Range for finding Y offset
+    COLS_X: t.Tuple[int, ...] = ()  # x() of each column
+    ROWS_Y: t.Tuple[int, ...] = ()  # y() of each row, for a zero y_offset
 
     class Block(BaseBlock):
         # For 1920x1080
@@ -105,6 +129,22 @@ class Parameters:
         P_BOMB = b"\x3c\x00\x32"  # RGB( 60,   0,  50)
         B_BOMB = b"\x09\x04\x33"  # RGB(  9,   4,  51)
 
+    def __init_subclass__(cls, **kwargs: t.Any) -> None:
+        super().__init_subclass__(**kwargs)
+        # Wizardry to merge Block enum members with default ones from Parameters.BLock
+        # Note: this merges with "root" class Parameters.BLock *only*, not with other
+        # (intermediary) parent bases, if any. Subclasses not declaring a Block, such as
+        # get_board_parameters() ones, share their parent's.
+        if "Block" not in vars(cls):
+            return
+        if cls.Block.__members__.keys() != Parameters.Block.__members__.keys():
+            members = Parameters.Block.__members__.copy()
+            members.update(cls.Block.__members__)
+            # Using cls.Block = enum.Enum(...) makes mypy unhappy.
+            setattr(cls, "Block", enum.Enum(
+                "Block", members, qualname=cls.Block.__qualname__, type=BaseBlock
+            ))  # fmt: skip
+
     @classmethod
     def x_offset(cls, col: int, x_offset: int) -> int:
         if not 0 <= col < c.BOARD_COLS:
@@ -117,7 +157,7 @@ class Parameters:
     def x(cls, col: int) -> int:
         if not 0 <= col < c.BOARD_COLS:
             raise InvalidValueError("Invalid column: %s", col)
-        return cls.OFFSET[0] + col * cls.BLOCK_SIZE[0] + cls.MATCH_X_OFFSET
+        return cls.COLS_X[col]
 
     @classmethod
     def y(cls, row: int, y_offset: int) -> int:
@@ -125,7 +165,7 @@ class Parameters:
             raise InvalidValueError("Invalid row: %s", row)
         if not 0 <= y_offset < cls.BLOCK_SIZE[1]:
             raise InvalidValueError("Invalid y offset: %s", y_offset)
-        return cls.OFFSET[1] + row * cls.BLOCK_SIZE[1] + y_offset
+        return cls.ROWS_Y[row] + y_offset
 
 
 class Parameters1920x1080(Parameters):
@@ -225,6 +265,16 @@ class GameWindow:
             move: get_keyname(settings[move.value]) for move in ai.Move
         }
         log.debug("Keymap: %s", self.keymap)
+        # MSS is much faster than PIL.ImageGrab. Not used in macOS, where it captures at
+        # Retina resolution, while ImageGrab resizes to the requested bbox
+        self.mss: t.Any = None
+        if u.HAVE_MSS and not u.MACOS:
+            try:
+                self.mss = u.mss.mss()
+            except u.mss.exception.ScreenShotError as e:
+                log.warning("Using PIL for screenshots, MSS failed: %s", e)
+        # Precise sleeps for key presses, once per process
+        u.set_timer_resolution()
         # Configure PyAutoGUI
         pyautogui.PAUSE = KEY_DELAY
         pyautogui.FAILSAFE = False
@@ -263,13 +313,15 @@ class GameWindow:
         log.warning("Failed to activate window %s", self.window)
         return False
 
-    def take_screenshot(self) -> Image:
-        bbox: BBox = self.bbox
+    def take_screenshot(self, bbox: t.Optional[BBox] = None) -> Image:
+        if bbox is None:
+            bbox = self.bbox
         log.debug("Taking window screenshot: %s", bbox)
-        image = PIL.ImageGrab.grab(bbox, **IMAGEGRAB_PARAMS)  # RGBA in macOS
-        if image.mode != "RGB":
-            image = image.convert(mode="RGB")
-        return image
+        if self.mss is not None:
+            shot = self.mss.grab(bbox)
+            return PIL.Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+        # RGBA in macOS, no need to convert(): parse_image() reads it as RGB
+        return PIL.ImageGrab.grab(bbox, **IMAGEGRAB_PARAMS)
 
     def close(self) -> None:
         log.info("Closing game")
@@ -280,14 +332,25 @@ class GameWindow:
         fps = 40  # 25ms
         clock = u.FrameRateLimiter(fps)
         error_count = 0
+        # Window geometry queries are system calls, so while polling for a new board
+        # reuse the bbox of the last screenshot that had a board in it
+        bbox: t.Optional[BBox] = None
         while True:
-            image: Image = self.take_screenshot()
-            size = image.size
+            if bbox is None:
+                bbox = self.bbox
+            size = (bbox[2] - bbox[0], bbox[3] - bbox[1])
             if size != self.prev_size:
                 log.info("Game window resized: %s", size)
                 self.prev_size = size
             try:
-                *_, board = board_data = parse_image(image)
+                if debug:
+                    image: Image = self.take_screenshot(bbox)
+                    *_, board = board_data = parse_image(image)
+                else:
+                    # Only the board area, a fraction of the window size
+                    params = get_parameters(size)
+                    image = self.take_screenshot(board_bbox(params, bbox))
+                    *_, board = board_data = parse_image(image, get_board_parameters(params))
             except UnsupportedWindowSizeError as e:
                 # warn every 2 seconds, raise after 10
                 if error_count >= 10 * fps:
@@ -295,9 +358,12 @@ class GameWindow:
                 if error_count % (2 * fps) == 0:
                     log.warning(e)
                 error_count += 1
+                bbox = None
                 clock.wait()
                 continue
-            if board is not None and board != self.prev_board:
+            if board is None:
+                bbox = None
+            elif board != self.prev_board:
                 if debug:
                     save_debug(board_data)
                 self.prev_board = board
@@ -320,10 +386,16 @@ def get_board_from_path(path: str, debug: bool = False) -> t.Optional[ai.Board]:
     return board_data.board
 
 
-def parse_image(image: Image) -> BoardData:
+def parse_image(image: Image, params: t.Optional[ParamCls] = None) -> BoardData:
     size = image.size
-    params = get_parameters(size)
-    data: bytes = image.tobytes()
+    if params is None:
+        params = get_parameters(size)
+    elif size != params.GAME_SIZE:
+        raise UnsupportedWindowSizeError(
+            "Image size %s does not match parameters size %s", size, params.GAME_SIZE
+        )
+    # Packing as RGB drops the alpha channel, if any, much faster than convert()
+    data: bytes = image.tobytes("raw", "RGB")
     assert len(data) == size[0] * size[1] * BPP
 
     y_offset = find_y_offset(data, params)
@@ -333,34 +405,89 @@ def parse_image(image: Image) -> BoardData:
     col = find_phage_column(data, params)
     block = find_held_block(data, params, col)
 
-    # TODO: Optimization: loop col->row, top to phage, break col when EMPTY
-    board = ai.Board(phage_col=col, held_block=block.to_ai())
-    for row in range(c.BOARD_ROWS):
-        for col in range(c.BOARD_COLS):
-            block = get_block_at(data, params, col, row, y_offset)
-            board.set_block(col, row, block.to_ai())
-
+    grid = get_grid(data, params, y_offset)
+    board = ai.Board(grid=grid, phage_col=col, held_block=block.to_ai())
     return BoardData(image, data, params, y_offset, board)
 
 
+def get_grid(data: bytes, p: ParamCls, y_offset: int) -> ai.Grid:
+    """Blocks of all board cells, as an ai.Board grid"""
+    if not u.HAVE_NUMPY:
+        # Columns can't be cut short at the first EMPTY, they may have gaps:
+        # thrown blocks flying up, rows still scrolling in, the title screen, etc
+        return bytearray(
+            get_block_at(data, p, col, row, y_offset).to_ai()
+            for row in range(c.BOARD_ROWS)
+            for col in range(c.BOARD_COLS)
+        )
+    ys = np.array(p.ROWS_Y) + y_offset
+    _, blocks = get_palette(p)
+    return bytearray(blocks[match_segments(data, p, ys)].tobytes())
+
+
+def match_segments(data: bytes, p: ParamCls, ys: "np.ndarray[t.Any, t.Any]") -> t.Any:
+    """Palette index of the blocks at all columns for each y, len(palette) if EMPTY
+
+    Same as Block.match() of all get_block_at(x=p.x(col), y=y), vectorized by NumPy.
+    Result shape: (len(ys), BOARD_COLS)
+    """
+    xs = np.array(p.COLS_X)
+    # Segments of all cells, as packed RGB. Shape: (ys, cols, MATCH_PIXELS)
+    segments = pack_rgb(
+        get_pixels(data, p)[ys[:, None, None], xs[:, None] + np.arange(MATCH_PIXELS)]
+    )
+    # A segment matches a palette color if all its pixels are the same as the first
+    # one, and that one is the color
+    uniform = (segments == segments[..., :1]).all(axis=-1)
+    palette = pack_rgb(get_palette(p)[0])
+    matches = (segments[..., :1] == palette) & uniform[..., None]
+    # First matching palette entry, or the last block, EMPTY, if none
+    return np.where(matches.any(axis=-1), matches.argmax(axis=-1), len(palette))
+
+
+def get_pixels(data: bytes, p: ParamCls) -> "np.ndarray[t.Any, np.dtype[np.uint8]]":
+    """View of image data, no copy. Shape: (height, width, BPP)"""
+    return np.frombuffer(data, dtype=np.uint8).reshape(p.GAME_SIZE[1], p.GAME_SIZE[0], BPP)
+
+
+def pack_rgb(pixels: "np.ndarray[t.Any, np.dtype[np.uint8]]") -> t.Any:
+    """RGB pixels as uint32 values, so they compare at once instead of per channel"""
+    rgb = pixels.astype(np.uint32)
+    return (rgb[..., 0] << 16) | (rgb[..., 1] << 8) | rgb[..., 2]
+
+
 def find_y_offset(data: bytes, p: ParamCls) -> t.Optional[int]:
     # TODO: Resolution-specific quirks:
     #  - 1600x900: green RGB varies in the same image, and can match the top.
     #    Do not trust for Y offset
+    if u.HAVE_NUMPY:
+        # Block.match() requires a segment's first pixel to be a palette color, so
+        # find those at all y at once, and fully check only them, in the same order
+        ys = np.arange(*p.BLOCKS_Y_RANGE)
+        firsts = pack_rgb(get_pixels(data, p)[ys[:, None], np.array(p.COLS_X)])
+        candidates = np.isin(firsts, pack_rgb(get_palette(p)[0]))
+        for i, col in zip(*np.nonzero(candidates)):
+            y = int(ys[i])
+            block = get_block_at(data, p, col=int(col), y=y)
+            if block is not p.Block.EMPTY:
+                return _y_offset(p, int(col), y, block)
+        return None
     for y in range(*p.BLOCKS_Y_RANGE):
         for col in range(c.BOARD_COLS):
-            x = p.x(col)
-            block = get_block_at(data, p, x=x, y=y)
-            if block is p.Block.EMPTY:
-                continue
-            row, y_offset = divmod(y - p.BLOCKS_Y_RANGE[1], p.BLOCK_SIZE[1])
-            log.debug("Y Offset: %2s, Pixel%s Board%s %s",
-                      y_offset, (x, y), (col, row), block)  # fmt: skip
-            return y_offset
+            block = get_block_at(data, p, col=col, y=y)
+            if block is not p.Block.EMPTY:
+                return _y_offset(p, col, y, block)
     else:
         return None
 
 
+def _y_offset(p: ParamCls, col: int, y: int, block: Parameters.Block) -> int:
+    row, y_offset = divmod(y - p.BLOCKS_Y_RANGE[1], p.BLOCK_SIZE[1])
+    log.debug("Y Offset: %2s, Pixel%s Board%s %s",
+              y_offset, (p.x(col), y), (col, row), block)  # fmt: skip
+    return y_offset
+
+
 def find_phage_column(data: bytes, p: ParamCls) -> t.Optional[int]:
     y = p.OFFSET[1] + p.PHAGE_SILVER_OFFSET[1]
     w = len(p.PHAGE_SILVER_DATA) // BPP
@@ -399,6 +526,21 @@ def get_block_at(
 # fmt: on
 
 
+def get_palette(p: ParamCls) -> Palette:
+    """Non-empty Block colors, and their AI Block IDs + EMPTY
+
+    In p.Block order, and with aliases already resolved, as required by get_grid().
+    """
+    if p.Block not in _palettes:
+        items = [item for item in p.Block if item.value]
+        blocks = [p.Block.match(MATCH_PIXELS * item.value).to_ai() for item in items]
+        _palettes[p.Block] = (
+            np.array([np.frombuffer(item.value, np.uint8) for item in items]),
+            np.array(blocks + [ai.EMPTY], dtype=np.uint8),
+        )
+    return _palettes[p.Block]
+
+
 def get_segment(data: bytes, p: ParamCls, x: int, y: int, pixels: int = 1) -> bytes:
     d = BPP * (p.GAME_SIZE[0] * y + x)
     return data[d : d + BPP * pixels]
@@ -410,12 +552,13 @@ def save_debug(board_data: BoardData, save_original: bool = True) -> None:
     serial = "" if board is None else f"_{board.serialize()}"
     if save_original:
         image.save(f"board_{p.GAME_SIZE[1]}{y}{serial}.png")
-    draw_debug(board_data).save(f"debug_{p.GAME_SIZE[1]}{y}{serial}.png")
+    # Original image is already saved, if at all, so draw on it
+    draw_debug(board_data, in_place=True).save(f"debug_{p.GAME_SIZE[1]}{y}{serial}.png")
 
 
-def draw_debug(board_data: BoardData) -> Image:
+def draw_debug(board_data: BoardData, in_place: bool = False) -> Image:
     original, data, p, y_offset, _ = board_data
-    img = original.copy()
+    img = original if in_place else original.copy()
     draw = PIL.ImageDraw.Draw(img)
 
     def draw_board_rect(y1: int, y2: int) -> None:
@@ -529,10 +672,30 @@ def get_parameters(size: Size) -> ParamCls:
             size,
             tuple(PARAMETERS.keys()),
         )
-    if cls.GAME_SIZE == size:
-        return cls  # class already updated
+    return cls
 
-    # Derived constants
+
+def get_board_parameters(p: ParamCls) -> ParamCls:
+    """Parameters for screenshots cropped to the board area, as taken by board_bbox()
+
+    A subclass of p with the board at the image origin, so all functions that take
+    parameters work unchanged on the smaller image.
+    """
+    if p not in _boards:
+        cls = t.cast(ParamCls, type(p.__name__ + "Board", (p,), {"OFFSET": (0, 0)}))
+        _update_parameters(cls, (p.WIDTH, p.HEIGHT))
+        _boards[p] = cls
+    return _boards[p]
+
+
+def board_bbox(p: ParamCls, bbox: BBox) -> BBox:
+    """Board area of the game window bbox, for get_board_parameters()"""
+    left, top = bbox[0] + p.OFFSET[0], bbox[1] + p.OFFSET[1]
+    return left, top, left + p.WIDTH, top + p.HEIGHT
+
+
+def _update_parameters(cls: ParamCls, size: Size) -> None:
+    """Set derived constants"""
     cls.GAME_SIZE = size
     cls.WIDTH = cls.BLOCK_SIZE[0] * c.BOARD_COLS
     cls.MATCH_X_OFFSET = (cls.BLOCK_SIZE[0] - MATCH_PIXELS) // 2
@@ -541,17 +704,16 @@ def get_parameters(size: Size) -> ParamCls:
         cls.OFFSET[1],
         -1,
     )
-    # Wizardry to merge Block enum members with default ones from Parameters.BLock
-    # Note: this merges with "root" class Parameters.BLock *only*, not with other
-    # (intermediary) parent bases, if any.
-    if cls.Block.__members__.keys() != Parameters.Block.__members__.keys():
-        members = Parameters.Block.__members__.copy()
-        members.update(cls.Block.__members__)
-        # Using cls.Block = enum.Enum(...) makes mypy unhappy.
-        setattr(cls, "Block", enum.Enum(
-            "Block", members, qualname=cls.Block.__qualname__, type=BaseBlock
-        ))  # fmt: skip
-    return cls
+    cls.COLS_X = tuple(
+        cls.OFFSET[0] + col * cls.BLOCK_SIZE[0] + cls.MATCH_X_OFFSET
+        for col in range(c.BOARD_COLS)
+    )
+    cls.ROWS_Y = tuple(cls.OFFSET[1] + row * cls.BLOCK_SIZE[1] for row in range(c.BOARD_ROWS))
+
+
+# Set derived constants once, so get_parameters() is a plain lookup
+for _size, _cls in PARAMETERS.items():
+    _update_parameters(_cls, _size)
 
 
 # fmt: off
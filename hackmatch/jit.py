@@ -0,0 +1,361 @@
+# This file is part of HackMatch, see <https://github.com/MestreLion/hackmatch>
+# Copyright (C) 2023 Rodrigo Silva (MestreLion) <linux@rodrigosilva.com>
+# License: GPLv3 or later, at your choice. See <http://www.gnu.org/licenses/gpl>
+
+"""
+Numba-compiled solver, used by ai.solve() when Numba is available
+
+Same algorithm as ai.solve_python(), ported to operate on a packed board state:
+a uint8 array with the grid Block IDs followed by phage column and held block.
+Boards are stored in a pre-allocated array, each one with a pointer to its parent
+and the move that created it, and the priority queue is a binary heap of indexes.
+Duplicates are detected by the same incremental Zobrist key as ai.Board.key.
+"""
+
+import time
+import typing as t
+
+import numba
+
+from . import ai
+from . import config as c
+from . import util as u
+
+np = u.numpy
+
+_F = t.TypeVar("_F", bound=t.Callable[..., t.Any])
+
+# fmt: off
+COLS     = c.BOARD_COLS
+ROWS     = c.BOARD_ROWS
+PHAGE    = COLS * ROWS  # State index of phage column, also the grid size
+HELD     = PHAGE + 1    # State index of held block
+STATE    = HELD + 1     # State size
+# fmt: on
+
+MAX_BOARDS = 1 << 20  # ~110MB of buffers, ~1s at the expected speed
+TABLE_SIZE = 2 * MAX_BOARDS  # Hash table size, must be a power of 2
+TIME_CHECK = 64  # Check for timeout every TIME_CHECK parent boards
+
+# Move codes
+LEFT, RIGHT, GRAB, SWAP = ai.LEFT, ai.RIGHT, ai.GRAB, ai.SWAP
+NUM_MOVES = len(ai.MOVES)
+# Indexed by last move code, including ai.NO_MOVE, and move code
+REDUNDANT = np.array(
+    [[move not in moves for move in range(NUM_MOVES)] for moves in ai.NEXT_MOVES]
+)
+
+MOVE_COST = ai.MOVE_COST
+MATCH_SIZE = np.frombuffer(ai.BLOCK_MATCH_SIZE, dtype=np.uint8)
+
+# Same Zobrist keys as ai.Board.key, so boards are identified by a uint64
+ZOBRIST_GRID = np.array(ai.ZOBRIST_GRID, dtype=np.uint64)
+ZOBRIST_PHAGE = np.array(ai.ZOBRIST_PHAGE, dtype=np.uint64)
+ZOBRIST_HELD = np.array(ai.ZOBRIST_HELD, dtype=np.uint64)
+
+
+class Buffers(t.NamedTuple):
+    """Solver arrays, allocated once and re-used by every solve()"""
+
+    boards: "np.ndarray[t.Any, np.dtype[np.uint8]]"  # Board states
+    parents: "np.ndarray[t.Any, np.dtype[np.int32]]"  # Parent board index
+    moves: "np.ndarray[t.Any, np.dtype[np.int8]]"  # Move code from parent
+    depths: "np.ndarray[t.Any, np.dtype[np.int32]]"  # Moves count
+    scores: "np.ndarray[t.Any, np.dtype[np.float64]]"  # Heap priority
+    keys: "np.ndarray[t.Any, np.dtype[np.uint64]]"  # Zobrist keys
+    heap: "np.ndarray[t.Any, np.dtype[np.int32]]"  # Priority queue of board indexes
+    table: "np.ndarray[t.Any, np.dtype[np.int32]]"  # Board index + 1, 0 if empty
+
+
+class Result(t.NamedTuple):
+    path: "np.ndarray[t.Any, np.dtype[np.int8]]"  # Move codes
+    boards: int
+    steps: int
+    queued: bool  # If there were boards left to solve
+    has_match: bool
+
+
+_buffers: t.Optional[Buffers] = None
+
+
+def njit(func: _F) -> _F:
+    return t.cast(_F, numba.njit(cache=True)(func))
+
+
+def get_buffers() -> Buffers:
+    global _buffers
+    if _buffers is None:
+        _buffers = Buffers(
+            boards=np.empty((MAX_BOARDS, STATE), dtype=np.uint8),
+            parents=np.empty(MAX_BOARDS, dtype=np.int32),
+            moves=np.empty(MAX_BOARDS, dtype=np.int8),
+            depths=np.empty(MAX_BOARDS, dtype=np.int32),
+            scores=np.empty(MAX_BOARDS, dtype=np.float64),
+            keys=np.empty(MAX_BOARDS, dtype=np.uint64),
+            heap=np.empty(MAX_BOARDS, dtype=np.int32),
+            table=np.empty(TABLE_SIZE, dtype=np.int32),
+        )
+    return _buffers
+
+
+def solve(board: ai.Board, timer: u.Timer) -> t.Tuple[ai.Candidate, int, int, bool]:
+    state = np.empty(STATE, dtype=np.uint8)
+    state[:PHAGE] = np.frombuffer(board.grid, dtype=np.uint8)
+    state[PHAGE] = board.phage_col
+    state[HELD] = board.held_block
+    deadline = int((timer.start + timer.secs) * 1e9) if timer.secs > 0 else 0
+    result = Result(*_solve(state, np.uint64(board.key), deadline, get_buffers()))
+    # Replay the path in a regular board
+    best = board.clone()
+    for move in result.path:
+        best.move(move)
+    if result.has_match:
+        candidate = ai.Candidate(board=best, has_match=True)
+    else:
+        candidate = ai.Candidate(board=best, score=best.score())
+    return candidate, result.boards, result.steps, result.queued
+
+
+@njit
+def _solve(
+    state: "np.ndarray[t.Any, np.dtype[np.uint8]]",
+    key: "np.uint64",
+    deadline: int,
+    buffers: Buffers,
+) -> t.Tuple["np.ndarray[t.Any, np.dtype[np.int8]]", int, int, bool, bool]:
+    boards, parents, moves, depths, scores, keys, heap, table = buffers
+    # Only the hash table must be cleared, other arrays are written before being read
+    table[:] = 0
+    # Scratch buffers for _evaluate()
+    grouped = np.empty(PHAGE, dtype=np.bool_)
+    stack = np.empty(PHAGE, dtype=np.int32)
+
+    boards[0] = state
+    moves[0] = ai.NO_MOVE
+    depths[0] = 0
+    keys[0] = key
+    _insert(keys, table, 0)
+    best = 0
+    best_score, has_match = _evaluate(boards[0], grouped, stack)
+    scores[0] = best_score
+    count = 1
+    queued = _push(heap, scores, 0, 0)
+    expanded = 0
+    steps = 0
+    while queued and not has_match and count + NUM_MOVES <= MAX_BOARDS:
+        if deadline and expanded % TIME_CHECK == 0:
+            with numba.objmode(now="int64"):
+                now = time.perf_counter_ns()
+            if now > deadline:
+                break
+        parent = heap[0]
+        queued = _pop(heap, scores, queued)
+        expanded += 1
+        depth = depths[parent] + 1
+        if steps < depth:
+            steps = depth
+        for move in range(NUM_MOVES):
+            if REDUNDANT[moves[parent], move]:
+                continue
+            board = boards[count]
+            board[:] = boards[parent]
+            delta = _move(board, move)
+            if not delta:
+                continue
+            keys[count] = keys[parent] ^ delta
+            if not _insert(keys, table, count):
+                continue
+            parents[count] = parent
+            moves[count] = move
+            depths[count] = depth
+            score, has_match = _evaluate(board, grouped, stack)
+            if has_match or score > best_score:
+                best, best_score = count, score
+            scores[count] = score - MOVE_COST * depth
+            queued = _push(heap, scores, queued, count)
+            count += 1
+            if has_match:
+                break
+
+    path = np.empty(depths[best], dtype=np.int8)
+    node = best
+    for i in range(len(path) - 1, -1, -1):
+        path[i] = moves[node]
+        node = parents[node]
+    return path, count, steps, queued > 0, has_match
+
+
+@njit
+def _before(scores: "np.ndarray[t.Any, np.dtype[np.float64]]", a: int, b: int) -> bool:
+    """Heap order: highest score first, then lowest index, i.e. FIFO"""
+    return scores[a] > scores[b] or (scores[a] == scores[b] and a < b)
+
+
+@njit
+def _push(
+    heap: "np.ndarray[t.Any, np.dtype[np.int32]]",
+    scores: "np.ndarray[t.Any, np.dtype[np.float64]]",
+    size: int,
+    index: int,
+) -> int:
+    """Add board index to the heap, return the new heap size"""
+    i = size
+    while i:
+        up = (i - 1) // 2
+        if not _before(scores, index, heap[up]):
+            break
+        heap[i] = heap[up]
+        i = up
+    heap[i] = index
+    return size + 1
+
+
+@njit
+def _pop(
+    heap: "np.ndarray[t.Any, np.dtype[np.int32]]",
+    scores: "np.ndarray[t.Any, np.dtype[np.float64]]",
+    size: int,
+) -> int:
+    """Remove the top board index from the heap, return the new heap size"""
+    size -= 1
+    last = heap[size]
+    i = 0
+    while True:
+        child = 2 * i + 1
+        if child >= size:
+            break
+        if child + 1 < size and _before(scores, heap[child + 1], heap[child]):
+            child += 1
+        if not _before(scores, heap[child], last):
+            break
+        heap[i] = heap[child]
+        i = child
+    heap[i] = last
+    return size
+
+
+@njit
+def _insert(
+    keys: "np.ndarray[t.Any, np.dtype[np.uint64]]",
+    table: "np.ndarray[t.Any, np.dtype[np.int32]]",
+    index: int,
+) -> bool:
+    """Add board key to hash table, return False if it was already there"""
+    key = keys[index]
+    mask = TABLE_SIZE - 1
+    slot = np.int64(key & np.uint64(mask))
+    while table[slot]:
+        if keys[table[slot] - 1] == key:
+            return False
+        slot = (slot + 1) & mask
+    table[slot] = index + 1
+    return True
+
+
+@njit
+def _lowest_block(
+    board: "np.ndarray[t.Any, np.dtype[np.uint8]]", col: int, up_to: int
+) -> int:
+    """Row of the lowest block in column, -1 if column is empty"""
+    for row in range(ROWS - 1, up_to - 1, -1):
+        if board[row * COLS + col]:
+            return row
+    return -1
+
+
+@njit
+def _move(board: "np.ndarray[t.Any, np.dtype[np.uint8]]", move: int) -> "np.uint64":
+    """Apply move in-place, return the change in board key, 0 if board was not changed"""
+    col = int(board[PHAGE])
+    if move == LEFT:
+        if col > 0:
+            board[PHAGE] = col - 1
+            return np.uint64(ZOBRIST_PHAGE[col] ^ ZOBRIST_PHAGE[col - 1])
+    elif move == RIGHT:
+        if col < COLS - 1:
+            board[PHAGE] = col + 1
+            return np.uint64(ZOBRIST_PHAGE[col] ^ ZOBRIST_PHAGE[col + 1])
+    elif move == SWAP:
+        row = _lowest_block(board, col, 1)
+        if row > 0:
+            i, j = row * COLS + col, (row - 1) * COLS + col
+            a, b = board[i], board[j]
+            board[i], board[j] = b, a
+            return np.uint64(
+                ZOBRIST_GRID[i, a]
+                ^ ZOBRIST_GRID[i, b]
+                ^ ZOBRIST_GRID[j, b]
+                ^ ZOBRIST_GRID[j, a]
+            )
+    elif move == GRAB:
+        row = _lowest_block(board, col, 0)
+        block = board[HELD]
+        if block:
+            # Throw: lowest block must not be at the lowest row
+            if row < ROWS - 1:
+                i = (row + 1) * COLS + col
+                board[i] = block
+                board[HELD] = 0
+                return np.uint64(ZOBRIST_GRID[i, block] ^ ZOBRIST_HELD[block])
+        elif row >= 0:
+            i = row * COLS + col
+            block = board[i]
+            board[HELD] = block
+            board[i] = 0
+            return np.uint64(ZOBRIST_GRID[i, block] ^ ZOBRIST_HELD[block])
+    return np.uint64(0)
+
+
+@njit
+def _evaluate(
+    board: "np.ndarray[t.Any, np.dtype[np.uint8]]",
+    grouped: "np.ndarray[t.Any, np.dtype[np.bool_]]",
+    stack: "np.ndarray[t.Any, np.dtype[np.int32]]",
+) -> t.Tuple[float, bool]:
+    """Same as ai.Board.score() and ai.Board.has_match()"""
+    grouped[:] = False
+    squares = 0
+    groups = 0
+    for i in range(PHAGE):
+        block = board[i]
+        if not block or grouped[i]:
+            continue
+        # Iterative flood fill
+        grouped[i] = True
+        stack[0] = i
+        top = 1
+        size = 0
+        while top:
+            top -= 1
+            j = stack[top]
+            size += 1
+            col = j % COLS
+            for k, valid in (
+                (j - 1, col > 0),
+                (j + 1, col < COLS - 1),
+                (j - COLS, j >= COLS),
+                (j + COLS, j + COLS < PHAGE),
+            ):
+                if valid and board[k] == block and not grouped[k]:
+                    grouped[k] = True
+                    stack[top] = k
+                    top += 1
+        if size >= MATCH_SIZE[block]:
+            return 0.0, True
+        squares += size * size
+        groups += 1
+
+    total = 0
+    height_squares = 0
+    for col in range(COLS):
+        height = 0
+        for row in range(ROWS):
+            if board[row * COLS + col]:
+                height += 1
+        total += height
+        height_squares += height * height
+    imbalance = height_squares - total * total / COLS
+
+    return (
+        squares / (groups if groups else 1) - imbalance**2 + (1 if board[HELD] else 0)
+    ), False
@@ -73,6 +73,14 @@ def parse_args(argv: t.Optional[t.List[str]] = None) -> argparse.Namespace:
         help="Time in milliseconds to solve each parsed board, 0 for unlimited."
         " [Default: %(default)s ms]",
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=ai.SOLVE_WORKERS,
+        metavar="N",
+        help="Solve in %(metavar)s worker processes when Numba is not available,"
+        " 0 for a single process. [Default: %(default)s]",
+    )
 
     group = parser.add_mutually_exclusive_group()
     group.add_argument(
@@ -103,6 +111,7 @@ def main(argv: t.Optional[t.List[str]] = None) -> None:
     u.setup_logging(args.loglevel)
     log.debug(args)
     c.init(args)
+    ai.SOLVE_WORKERS = c.args.workers
 
     if not (c.args.path is None and c.args.string is None):
         if c.args.path is not None:
@@ -131,6 +140,7 @@ def main(argv: t.Optional[t.List[str]] = None) -> None:
     window = get_game_window(activate=(c.args.path is None))
     assert window is not None
     log.info("Game window: %s", window)
+    ai.warmup()
 
     timer = u.Timer(60) if c.args.benchmark else u.Clock()
     while not timer.expired:
@@ -5,6 +5,8 @@
 """
 General utilities
 """
+import atexit
+import importlib.util
 import logging
 import os
 import subprocess
@@ -29,12 +31,37 @@ try:
 except ImportError:
     HAVE_PYGAME = False
 
+try:
+    import numpy as numpy
+
+    HAVE_NUMPY = True
+except ImportError:
+    HAVE_NUMPY = False
+
+# Numba is slow to import, so it is only imported by jit.py, when solving
+HAVE_NUMBA = HAVE_NUMPY and importlib.util.find_spec("numba") is not None
+
+try:
+    import mss as mss
+
+    HAVE_MSS = True
+except ImportError:
+    HAVE_MSS = False
+
 
 # Dummy to make mypy happy. Will be overriden on Windows platforms
 def my_documents_path(suffix: str = "") -> str:
     return os.path.join("~/Documents", suffix)
 
 
+# Only needed on Windows, where default timer resolution is ~15.6ms
+def set_timer_resolution(ms: int = 1) -> None:
+    pass
+
+
+_timer_resolution = 0  # Set by set_timer_resolution(), 0 if not set
+
+
 # Platform detection
 # Bool constants used to encapsulate detection method, currently sys.platform
 # Windows
@@ -67,6 +94,18 @@ if sys.platform == "win32":
         )
         return os.path.join(buf.value, suffix)
 
+    def set_timer_resolution(ms: int = 1) -> None:
+        # So time.sleep() in FrameRateLimiter and PyAutoGUI's PAUSE are precise.
+        # Applies to the whole process, so it is set only once, and restored on exit
+        # with the matching timeEndPeriod().
+        # Python >= 3.11 already uses high-resolution timers for time.sleep()
+        global _timer_resolution
+        if _timer_resolution:
+            return
+        if ctypes.windll.winmm.timeBeginPeriod(ms) == 0:  # TIMERR_NOERROR
+            _timer_resolution = ms
+            atexit.register(ctypes.windll.winmm.timeEndPeriod, ms)
+
 
 # macOS
 elif sys.platform == "darwin":